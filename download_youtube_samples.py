@@ -6,16 +6,32 @@ Focuses on videos with professional, human-created captions.
 
 import os
 import sys
-import json
+import orjson
 import logging
-import subprocess
+import shutil
 from pathlib import Path
 import yt_dlp
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+MAX_CONCURRENT_DOWNLOADS = 4
+
+# VTT parsing patterns, compiled once rather than per caption line
+_TS_RE = re.compile(r'(\d{2}:\d{2}:\d{2}\.\d{3})')
+_TAG_RE = re.compile(r'<.*?>')
+_BRK_RE = re.compile(r'\[.*?\]')
+_WS_RE = re.compile(r'\s+')
+
+
+def _time_to_seconds(time_str: str) -> float:
+    """Convert an HH:MM:SS timestamp to seconds."""
+    parts = time_str.split(':')
+    return int(parts[0]) * 3600 + int(parts[1]) * 60 + float(parts[2])
+
+
 class YouTubeDatasetDownloader:
     def __init__(self):
         self.data_dir = Path("data")
@@ -103,51 +119,33 @@ class YouTubeDatasetDownloader:
             ]
         }
     
-    def check_manual_captions(self, url: str) -> bool:
-        """Check if video has manual (not auto-generated) captions."""
-        try:
-            ydl_opts = {
-                'quiet': True,
-                'no_warnings': True,
-                'skip_download': True
-            }
-            
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
-                
-                # Check for manual subtitles
-                if 'subtitles' in info and 'en' in info['subtitles']:
-                    # Manual subtitles are in 'subtitles'
-                    # Auto-generated are in 'automatic_captions'
-                    return True
-                    
-                return False
-                
-        except Exception as e:
-            logger.error(f"Error checking captions: {str(e)}")
-            return False
-    
     def download_sample(self, sample: dict, category: str) -> bool:
         """Download a single sample with audio and captions."""
         try:
             logger.info(f"\nDownloading: {sample['name']}")
             logger.info(f"Description: {sample['description']}")
             
-            # First check if manual captions exist
-            if not self.check_manual_captions(sample['url']):
-                logger.warning(f"⚠️  No manual captions found for {sample['name']}")
-                logger.warning("   This video may only have auto-generated captions")
-            
             # Download audio with specific time range
-            audio_output = str(self.audio_dir / f"{sample['name']}.mp3")
+            audio_path = self.audio_dir / f"{sample['name']}.mp3"
+            audio_output = str(audio_path)
+            transcript_path = self.transcript_dir / f"{sample['name']}.txt"
+            
+            # Skip samples a previous run already completed
+            if audio_path.exists() and audio_path.stat().st_size > 0 and transcript_path.exists():
+                logger.info(f"✓ Already downloaded: {sample['name']}")
+                return True
             
-            # Build ffmpeg command for trimming
-            ss_param = ['-ss', sample['start']] if sample['start'] != "00:00:00" else []
-            t_param = ['-t', sample['duration']]
+            # Only fetch the requested time span rather than the full stream
+            start_sec = _time_to_seconds(sample['start'])
+            end_sec = start_sec + _time_to_seconds(sample['duration'])
             
+            # Audio and manual captions come from a single extraction
             ydl_opts = {
                 'format': 'bestaudio/best',
-                'outtmpl': str(self.audio_dir / f"{sample['name']}_temp.%(ext)s"),
+                'outtmpl': {
+                    'default': str(self.audio_dir / f"{sample['name']}_temp.%(ext)s"),
+                    'subtitle': str(self.transcript_dir / f"{sample['name']}_temp.%(ext)s"),
+                },
                 'quiet': True,
                 'no_warnings': True,
                 'postprocessors': [{
@@ -155,30 +153,22 @@ class YouTubeDatasetDownloader:
                     'preferredcodec': 'mp3',
                     'preferredquality': '192',
                 }],
-                'external_downloader': 'ffmpeg',
-                'external_downloader_args': {
-                    'ffmpeg_i': ss_param,
-                    'ffmpeg': t_param
-                }
-            }
-            
-            # Download audio
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([sample['url']])
-            
-            # Download captions
-            caption_opts = {
+                'download_ranges': yt_dlp.utils.download_range_func(None, [(start_sec, end_sec)]),
+                'force_keyframes_at_cuts': True,
                 'writesubtitles': True,
                 'writeautomaticsub': False,  # Only manual subs
                 'subtitleslangs': ['en'],
-                'skip_download': True,
-                'outtmpl': str(self.transcript_dir / f"{sample['name']}_temp.%(ext)s"),
-                'quiet': True,
             }
             
-            with yt_dlp.YoutubeDL(caption_opts) as ydl:
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
                 info = ydl.extract_info(sample['url'], download=True)
             
+            # Manual subtitles are in 'subtitles'
+            # Auto-generated are in 'automatic_captions'
+            if not info.get('requested_subtitles'):
+                logger.warning(f"⚠️  No manual captions found for {sample['name']}")
+                logger.warning("   This video may only have auto-generated captions")
+            
             # Convert VTT to plain text
             vtt_files = list(self.transcript_dir.glob(f"{sample['name']}_temp*.vtt"))
             if vtt_files:
@@ -204,41 +194,35 @@ class YouTubeDatasetDownloader:
     def convert_vtt_to_text(self, vtt_path: Path, start_time: str, duration: str):
         """Convert VTT captions to plain text, extracting only the specified time range."""
         try:
-            with open(vtt_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Parse start time and duration
-            def time_to_seconds(time_str):
-                parts = time_str.split(':')
-                return int(parts[0]) * 3600 + int(parts[1]) * 60 + float(parts[2])
-            
-            start_sec = time_to_seconds(start_time)
-            duration_sec = time_to_seconds(duration)
+            start_sec = _time_to_seconds(start_time)
+            duration_sec = _time_to_seconds(duration)
             end_sec = start_sec + duration_sec
             
-            # Extract captions within time range
-            lines = content.split('\n')
+            # Extract captions within time range, streaming the file line by line
             transcript_lines = []
-            current_time = 0
             in_time_range = False
             
-            for i, line in enumerate(lines):
-                if '-->' in line:
-                    # Parse timestamp
-                    time_match = re.match(r'(\d{2}:\d{2}:\d{2}\.\d{3})', line)
-                    if time_match:
-                        current_time = time_to_seconds(time_match.group(1).replace('.', ':'))
-                        in_time_range = start_sec <= current_time <= end_sec
-                elif in_time_range and line.strip() and not line.startswith('WEBVTT'):
-                    # Clean and add caption text
-                    clean_line = re.sub(r'<.*?>', '', line)  # Remove HTML tags
-                    clean_line = re.sub(r'\[.*?\]', '', clean_line)  # Remove speaker labels
-                    if clean_line.strip():
-                        transcript_lines.append(clean_line.strip())
+            with open(vtt_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if '-->' in line:
+                        # Parse timestamp
+                        time_match = _TS_RE.match(line)
+                        if time_match:
+                            current_time = _time_to_seconds(time_match.group(1).replace('.', ':'))
+                            if current_time > end_sec:
+                                # Cues are chronological, nothing later is in range
+                                break
+                            in_time_range = start_sec <= current_time
+                    elif in_time_range and line.strip() and not line.startswith('WEBVTT'):
+                        # Clean and add caption text
+                        clean_line = _TAG_RE.sub('', line)  # Remove HTML tags
+                        clean_line = _BRK_RE.sub('', clean_line).strip()  # Remove speaker labels
+                        if clean_line:
+                            transcript_lines.append(clean_line)
             
             # Join and clean transcript
             transcript = ' '.join(transcript_lines)
-            transcript = re.sub(r'\s+', ' ', transcript)
+            transcript = _WS_RE.sub(' ', transcript)
             
             # Save transcript
             output_path = self.transcript_dir / f"{vtt_path.stem.replace('_temp', '')}.txt"
@@ -256,17 +240,18 @@ class YouTubeDatasetDownloader:
         successful = 0
         total = len(self.samples['clean']) + len(self.samples['challenging'])
         
-        # Download clean samples
-        logger.info("=== Downloading Clean Audio Samples ===")
-        for sample in self.samples['clean']:
-            if self.download_sample(sample, 'clean'):
-                successful += 1
-        
-        # Download challenging samples
-        logger.info("\n=== Downloading Challenging Audio Samples ===")
-        for sample in self.samples['challenging']:
-            if self.download_sample(sample, 'challenging'):
-                successful += 1
+        # Downloads are independent and network-bound, so run a few at once
+        # (kept small to stay under YouTube's rate limits)
+        logger.info("=== Downloading Clean and Challenging Audio Samples ===")
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_DOWNLOADS) as executor:
+            futures = [
+                executor.submit(self.download_sample, sample, category)
+                for category, samples in self.samples.items()
+                for sample in samples
+            ]
+            for future in as_completed(futures):
+                if future.result():
+                    successful += 1
         
         # Create metadata
         metadata = {
@@ -280,8 +265,8 @@ class YouTubeDatasetDownloader:
             "notes": "All samples trimmed to 30-45 minutes with manual captions"
         }
         
-        with open(self.data_dir / 'youtube_dataset_metadata.json', 'w') as f:
-            json.dump(metadata, f, indent=2)
+        with open(self.data_dir / 'youtube_dataset_metadata.json', 'wb', buffering=1 << 16) as f:
+            f.write(orjson.dumps(metadata, option=orjson.OPT_INDENT_2))
         
         logger.info(f"\n✓ Successfully downloaded {successful}/{total} samples")
         logger.info(f"Audio files: {self.audio_dir}")
@@ -294,9 +279,7 @@ class YouTubeDatasetDownloader:
 
 def main():
     # Check dependencies
-    try:
-        subprocess.run(['ffmpeg', '-version'], capture_output=True, check=True)
-    except (subprocess.CalledProcessError, FileNotFoundError):
+    if shutil.which('ffmpeg') is None:
         logger.error("ffmpeg is required. Please install: brew install ffmpeg")
         sys.exit(1)
     
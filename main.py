@@ -1,23 +1,25 @@
 #!/usr/bin/env python3
 import os
 import sys
+import csv
 import json
+import orjson
 import time
+import asyncio
 import logging
 import argparse
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from tqdm import tqdm
+from openai import AsyncOpenAI
+from tqdm.asyncio import tqdm
 
 from src.config import Config
 from src.audio_processor import AudioProcessor
 from src.transcriber import GPT4OTranscriber
 from src.wer_calculator import WERCalculator
-from src.dataset_manager import DatasetManager
+from src.dataset_manager import DatasetItem, DatasetManager
 
 logging.basicConfig(
     level=logging.INFO,
@@ -25,74 +27,184 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Columns of the per-test results journal, in output order
+RESULT_COLUMNS = [
+    'file_name', 'speed_factor', 'original_duration', 'processed_duration',
+    'duration_reduction', 'original_cost', 'actual_cost', 'cost_savings',
+    'processing_time', 'wer', 'cer', 'hits', 'substitutions', 'deletions',
+    'insertions', 'reference_length', 'hypothesis_length', 'accuracy',
+    'input_tokens', 'output_tokens', 'total_tokens', 'transcription',
+    'reference', 'error'
+]
+
+# Columns the plots and report read; the long text columns are left out
+SUMMARY_COLUMNS = [
+    'file_name', 'speed_factor', 'original_duration', 'duration_reduction',
+    'actual_cost', 'cost_savings', 'processing_time', 'wer',
+    'input_tokens', 'output_tokens'
+]
+
+
+def _json_default(obj):
+    """Serialize values orjson does not handle natively."""
+    if obj is pd.NA:
+        return None
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
 
 class GPT4OPerformanceTester:
     def __init__(self):
         self.audio_processor = AudioProcessor()
         self.transcriber = GPT4OTranscriber()
-        self.wer_calculator = WERCalculator()
+        self.wer_calculator = WERCalculator(cache_path=Config.WER_CACHE_PATH)
         self.dataset_manager = DatasetManager()
         
-        self.results_dir = Config.RESULTS_DIR
-        os.makedirs(self.results_dir, exist_ok=True)
+        self.results_dir = Path(Config.RESULTS_DIR)
+        self.results_dir.mkdir(parents=True, exist_ok=True)
         os.makedirs(Config.TEMP_DIR, exist_ok=True)
         
         self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     
-    def run_single_test(self, audio_path: str, reference_text: str, speed_factor: float) -> Dict:
-        """Run a single transcription test at specified speed."""
-        logger.info(f"Testing {Path(audio_path).name} at {speed_factor}x speed")
+    def _prepare_audio_batch(self, audio_path: str,
+                             speed_factors: List[float]) -> List[Union[str, bytes, Exception]]:
+        """Return the audio (or processing error) to transcribe at each speed.
         
-        try:
-            original_duration, original_size = self.audio_processor.get_audio_info(audio_path)
-            
-            if speed_factor == 1.0:
-                processed_path = audio_path
-            else:
-                processed_path = self.audio_processor.process_audio(audio_path, speed_factor)
-            
-            processed_duration, processed_size = self.audio_processor.get_audio_info(processed_path)
-            
-            transcription, metadata = self.transcriber.transcribe(processed_path)
-            
-            wer_metrics = self.wer_calculator.calculate_wer(reference_text, transcription)
-            
-            # Get actual costs from metadata (token-based pricing)
-            actual_cost = metadata.get('total_cost', 0)
+        The original file is used as-is at 1.0x; other speeds are piped out of
+        ffmpeg as in-memory mp3 data rather than written to temp files.
+        """
+        processed = iter(self.audio_processor.process_audio_batch(
+            audio_path, [s for s in speed_factors if s != 1.0], to_bytes=True
+        ))
+        return [audio_path if s == 1.0 else next(processed) for s in speed_factors]
+    
+    def _build_result(self, audio_path: str, reference_text: str, normalized_reference: str,
+                      speed_factor: float, processed_audio: Union[str, bytes], transcription: str,
+                      metadata: Dict) -> Dict:
+        """Score a transcription against its pre-normalized reference and assemble the result row."""
+        original_duration, original_size = self.audio_processor.get_audio_info(audio_path)
+        processed_duration, _ = self.audio_processor.get_audio_info(processed_audio)
+        
+        hypothesis = self.wer_calculator.normalize_text(transcription)
+        wer_metrics = self.wer_calculator.calculate_wer(
+            normalized_reference, hypothesis, normalize=False, compute_cer=Config.COMPUTE_CER
+        )
+        
+        # Get actual costs from metadata (token-based pricing)
+        actual_cost = metadata.get('total_cost', 0)
+        
+        # Estimate what original would have cost
+        original_file_size_mb = original_size / (1024 * 1024)
+        original_cost = self.transcriber.estimate_cost(original_file_size_mb)
+        
+        return {
+            'file_name': Path(audio_path).name,
+            'speed_factor': speed_factor,
+            'original_duration': original_duration,
+            'processed_duration': processed_duration,
+            'duration_reduction': (1 - processed_duration/original_duration) * 100,
+            'original_cost': original_cost,
+            'actual_cost': actual_cost,
+            'cost_savings': (1 - actual_cost/original_cost) * 100 if original_cost > 0 else 0,
+            'processing_time': metadata['processing_time'],
+            **wer_metrics,
+            'input_tokens': metadata.get('input_tokens', 0),
+            'output_tokens': metadata.get('output_tokens', 0),
+            'total_tokens': metadata.get('total_tokens', 0),
+            'transcription': transcription,
+            'reference': reference_text
+        }
+    
+    def _error_result(self, file_name: str, speed_factor: float, error: Exception) -> Dict:
+        """Log a failed test and build its result row."""
+        logger.error(f"Error in test: {str(error)}")
+        return {
+            'file_name': file_name,
+            'speed_factor': speed_factor,
+            'error': str(error)
+        }
+    
+    async def run_file_tests_async(self, item: DatasetItem, speed_factors: List[float],
+                                   semaphore: asyncio.Semaphore,
+                                   client: Optional[AsyncOpenAI] = None) -> List[Dict]:
+        """Run every speed factor for one file, transcribing the variants as one batch."""
+        audio_path = item.audio_path
+        file_name = Path(audio_path).name
+        
+        async with semaphore:
+            logger.info(f"Testing {file_name} at speeds {speed_factors}")
+            reference_text = await asyncio.to_thread(
+                self.dataset_manager.load_transcript, item.transcript_path
+            )
+            # Normalize the reference once and score every speed variant against it
+            normalized_reference = await asyncio.to_thread(
+                self.wer_calculator.normalize_text, reference_text
+            )
             
-            # Estimate what original would have cost
-            original_file_size_mb = original_size / (1024 * 1024)
-            original_cost = self.transcriber.estimate_cost(original_file_size_mb)
+            # Preprocess all speed variants in parallel so they can be submitted together
+            processed_audio = await asyncio.to_thread(
+                self._prepare_audio_batch, audio_path, speed_factors
+            )
             
-            result = {
-                'file_name': Path(audio_path).name,
-                'speed_factor': speed_factor,
-                'original_duration': original_duration,
-                'processed_duration': processed_duration,
-                'duration_reduction': (1 - processed_duration/original_duration) * 100,
-                'original_cost': original_cost,
-                'actual_cost': actual_cost,
-                'cost_savings': (1 - actual_cost/original_cost) * 100 if original_cost > 0 else 0,
-                'processing_time': metadata['processing_time'],
-                **wer_metrics,
-                'input_tokens': metadata.get('input_tokens', 0),
-                'output_tokens': metadata.get('output_tokens', 0),
-                'total_tokens': metadata.get('total_tokens', 0),
-                'transcription': transcription,
-                'reference': reference_text
-            }
+            ready_audio = [audio for audio in processed_audio if not isinstance(audio, Exception)]
+            outputs = iter(await self.transcriber.transcribe_many(ready_audio, client=client))
             
-            return result
+            results = []
+            for speed_factor, audio in zip(speed_factors, processed_audio):
+                output = audio if isinstance(audio, Exception) else next(outputs)
+                if isinstance(output, Exception):
+                    results.append(self._error_result(file_name, speed_factor, output))
+                    continue
+                
+                transcription, metadata = output
+                try:
+                    results.append(await asyncio.to_thread(
+                        self._build_result, audio_path, reference_text, normalized_reference,
+                        speed_factor, audio, transcription, metadata
+                    ))
+                except Exception as e:
+                    results.append(self._error_result(file_name, speed_factor, e))
             
-        except Exception as e:
-            logger.error(f"Error in test: {str(e)}")
+            return results
+    
+    async def _run_tests(self, dataset_items: List[DatasetItem], speed_factors: List[float],
+                         completed_keys: Set[Tuple[str, float]],
+                         record: Callable[[List[Dict]], None]):
+        """Run all pending tests concurrently, recording each file's results as it finishes."""
+        semaphore = asyncio.Semaphore(Config.MAX_CONCURRENCY)
+        # One pooled client for the whole run, created inside this event loop,
+        # so every file's requests reuse the same keep-alive connections
+        client = self.transcriber.async_client()
+        
+        async def run_and_record(item: DatasetItem, pending_speeds: List[float]):
+            # Runs on the event loop thread, so journal writes never interleave
+            record(await self.run_file_tests_async(item, pending_speeds, semaphore, client))
+        
+        tests = []
+        for item in dataset_items:
+            file_name = Path(item.audio_path).name
+            pending_speeds = [s for s in speed_factors if (file_name, s) not in completed_keys]
+            if pending_speeds:
+                tests.append(run_and_record(item, pending_speeds))
+        
+        try:
+            await tqdm.gather(*tests, desc="Running tests")
+        finally:
+            await client.close()
+    
+    def _load_completed_keys(self, journal_path: Path) -> Set[Tuple[str, float]]:
+        """Return the (file_name, speed_factor) pairs that succeeded in an existing journal."""
+        if not journal_path.exists():
+            return set()
+        
+        with open(journal_path, newline='', encoding='utf-8') as f:
             return {
-                'file_name': Path(audio_path).name,
-                'speed_factor': speed_factor,
-                'error': str(e)
+                (row['file_name'], float(row['speed_factor']))
+                for row in csv.DictReader(f)
+                if not row.get('error')
             }
     
-    def run_full_test(self, speed_factors: List[float] = None) -> pd.DataFrame:
+    def run_full_test(self, speed_factors: List[float] = None,
+                      resume_path: Optional[str] = None) -> pd.DataFrame:
         """Run complete test suite across all files and speed factors."""
         if speed_factors is None:
             speed_factors = Config.SPEED_FACTORS
@@ -107,63 +219,115 @@ class GPT4OPerformanceTester:
         dataset_items = self.dataset_manager.get_dataset_items()
         logger.info(f"Running tests on {len(dataset_items)} files with speeds: {speed_factors}")
         
-        results = []
-        total_tests = len(dataset_items) * len(speed_factors)
+        # Each result is journaled as soon as it is available so a crash
+        # mid-run keeps completed (and already paid for) tests
+        if resume_path:
+            journal_path = Path(resume_path)
+        else:
+            journal_path = self.results_dir / f"test_journal_{self.timestamp}.csv"
+        completed_keys = self._load_completed_keys(journal_path)
+        if completed_keys:
+            logger.info(f"Resuming from {journal_path}: skipping {len(completed_keys)} completed tests")
         
-        with tqdm(total=total_tests, desc="Running tests") as pbar:
-            for item in dataset_items:
-                reference_text = self.dataset_manager.load_transcript(item['transcript_path'])
-                
-                for speed_factor in speed_factors:
-                    result = self.run_single_test(
-                        item['audio_path'],
-                        reference_text,
-                        speed_factor
-                    )
-                    results.append(result)
-                    pbar.update(1)
+        write_header = not journal_path.exists() or journal_path.stat().st_size == 0
+        with open(journal_path, 'a', newline='', encoding='utf-8') as f:
+            journal = csv.DictWriter(f, fieldnames=RESULT_COLUMNS, extrasaction='ignore')
+            if write_header:
+                journal.writeheader()
+            
+            def record(results: List[Dict]):
+                journal.writerows(results)
+                f.flush()
+                os.fsync(f.fileno())
+            
+            asyncio.run(self._run_tests(dataset_items, speed_factors, completed_keys, record))
         
         self.audio_processor.cleanup_temp_files()
+        self.transcriber.clear_encoding_cache()
         
-        df = pd.DataFrame(results)
+        # Failed tests retried on resume appear twice; keep the latest attempt
+        # Arrow-backed dtypes keep the long transcription/reference strings
+        # far more compact than object columns
+        df = pd.read_csv(journal_path, dtype_backend='pyarrow')
+        df = df.drop_duplicates(subset=['file_name', 'speed_factor'], keep='last')
         return df
     
-    def save_results(self, df: pd.DataFrame):
-        """Save test results to CSV and JSON."""
-        csv_path = os.path.join(self.results_dir, f"test_results_{self.timestamp}.csv")
-        json_path = os.path.join(self.results_dir, f"test_results_{self.timestamp}.json")
+    def save_results(self, df: pd.DataFrame, write_csv: bool = False):
+        """Save test results to Parquet and JSON, plus CSV if requested."""
+        parquet_path = self.results_dir / f"test_results_{self.timestamp}.parquet"
+        json_path = self.results_dir / f"test_results_{self.timestamp}.json"
         
-        df.to_csv(csv_path, index=False)
-        df.to_json(json_path, orient='records', indent=2)
+        df.to_parquet(parquet_path, compression='zstd', index=False)
+        with open(json_path, 'wb') as f:
+            f.write(orjson.dumps(
+                df.to_dict(orient='records'),
+                option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY,
+                default=_json_default
+            ))
         
-        logger.info(f"Results saved to {csv_path} and {json_path}")
-        return csv_path
+        if write_csv:
+            csv_path = self.results_dir / f"test_results_{self.timestamp}.csv"
+            df.to_csv(csv_path, index=False)
+            logger.info(f"Results saved to {parquet_path}, {csv_path} and {json_path}")
+        else:
+            logger.info(f"Results saved to {parquet_path} and {json_path}")
+        return parquet_path
     
-    def generate_visualizations(self, df: pd.DataFrame):
+    def _compute_summaries(self, df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """Compute the successful-test frame and per-speed aggregates shared by plots and report."""
+        # Plots and report get plain numpy dtypes: Arrow-backed columns turn a
+        # single-sample std into <NA>, which matplotlib cannot plot
+        clean_df = df.loc[~df['wer'].isna(), SUMMARY_COLUMNS].astype(
+            {column: 'float64' for column in SUMMARY_COLUMNS if column != 'file_name'}
+        )
+        
+        by_speed = clean_df.groupby('speed_factor').agg(
+            wer=('wer', 'mean'),
+            wer_std=('wer', 'std'),
+            actual_cost=('actual_cost', 'mean'),
+            cost_savings=('cost_savings', 'mean'),
+            processing_time=('processing_time', 'mean'),
+            input_tokens=('input_tokens', 'mean'),
+            output_tokens=('output_tokens', 'mean'),
+            duration_reduction=('duration_reduction', 'mean')
+        )
+        
+        return {'clean_df': clean_df, 'by_speed': by_speed}
+    
+    def generate_visualizations(self, df: pd.DataFrame, summaries: Dict[str, pd.DataFrame] = None):
         """Generate performance visualization plots."""
-        plt.style.use('default')
-        fig, axes = plt.subplots(2, 2, figsize=(15, 12))
+        if summaries is None:
+            summaries = self._compute_summaries(df)
+        clean_df = summaries['clean_df']
+        by_speed = summaries['by_speed']
+        
+        # Imported here so runs without plots never pay matplotlib's startup cost
+        from matplotlib import style
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
         
-        clean_df = df[~df['wer'].isna()].copy()
+        # Object-oriented Agg rendering skips pyplot's global figure registry
+        # and never touches an interactive backend
+        style.use('default')
+        fig = Figure(figsize=(15, 12))
+        FigureCanvasAgg(fig)
+        axes = fig.subplots(2, 2)
         
         ax = axes[0, 0]
-        speed_wer = clean_df.groupby('speed_factor')['wer'].agg(['mean', 'std']).reset_index()
-        ax.bar(speed_wer['speed_factor'], speed_wer['mean'], yerr=speed_wer['std'], capsize=5)
+        ax.bar(by_speed.index, by_speed['wer'], yerr=by_speed['wer_std'], capsize=5)
         ax.set_xlabel('Speed Factor')
         ax.set_ylabel('Word Error Rate (WER)')
         ax.set_title('Average WER by Speed Factor')
-        ax.set_ylim(0, max(0.5, speed_wer['mean'].max() * 1.2))
+        ax.set_ylim(0, max(0.5, by_speed['wer'].max() * 1.2))
         
         ax = axes[0, 1]
-        speed_cost = clean_df.groupby('speed_factor')['cost_savings'].mean().reset_index()
-        ax.bar(speed_cost['speed_factor'], speed_cost['cost_savings'])
+        ax.bar(by_speed.index, by_speed['cost_savings'])
         ax.set_xlabel('Speed Factor')
         ax.set_ylabel('Cost Savings (%)')
         ax.set_title('Average Cost Savings by Speed Factor')
         
         ax = axes[1, 0]
-        for speed in clean_df['speed_factor'].unique():
-            speed_data = clean_df[clean_df['speed_factor'] == speed]
+        for speed, speed_data in clean_df.groupby('speed_factor', sort=False):
             ax.scatter(speed_data['original_duration']/60, speed_data['wer'], 
                       label=f'{speed}x', alpha=0.7, s=100)
         ax.set_xlabel('Original Duration (minutes)')
@@ -172,11 +336,7 @@ class GPT4OPerformanceTester:
         ax.legend()
         
         ax = axes[1, 1]
-        metrics_df = clean_df.groupby('speed_factor').agg({
-            'wer': 'mean',
-            'cost_savings': 'mean',
-            'processing_time': 'mean'
-        }).round(3)
+        metrics_df = by_speed[['wer', 'cost_savings', 'processing_time']].round(3)
         
         ax.axis('tight')
         ax.axis('off')
@@ -189,19 +349,22 @@ class GPT4OPerformanceTester:
         table.set_fontsize(10)
         ax.set_title('Summary Statistics by Speed Factor', pad=20)
         
-        plt.tight_layout()
-        plot_path = os.path.join(self.results_dir, f"performance_analysis_{self.timestamp}.png")
-        plt.savefig(plot_path, dpi=300, bbox_inches='tight')
-        plt.close()
+        fig.tight_layout()
+        plot_path = self.results_dir / f"performance_analysis_{self.timestamp}.png"
+        fig.savefig(plot_path, dpi=300, bbox_inches='tight')
         
         logger.info(f"Visualizations saved to {plot_path}")
         return plot_path
     
-    def generate_report(self, df: pd.DataFrame):
+    def generate_report(self, df: pd.DataFrame, summaries: Dict[str, pd.DataFrame] = None):
         """Generate a comprehensive markdown report."""
-        clean_df = df[~df['wer'].isna()].copy()
+        if summaries is None:
+            summaries = self._compute_summaries(df)
+        clean_df = summaries['clean_df']
+        summary = summaries['by_speed']
         
-        report = f"""# GPT-4o Audio Performance Test Report
+        # Collect the report in pieces and join once at the end
+        parts = [f"""# GPT-4o Audio Performance Test Report
 Generated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
 
 ## Test Configuration
@@ -213,59 +376,48 @@ Generated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
 
 | Speed Factor | Avg WER | Avg Cost ($) | Avg Input Tokens | Avg Output Tokens | Duration Reduction |
 |--------------|---------|--------------|------------------|-------------------|---------------------|
-"""
-        
-        for speed in sorted(clean_df['speed_factor'].unique()):
-            speed_data = clean_df[clean_df['speed_factor'] == speed]
-            avg_wer = speed_data['wer'].mean()
-            avg_cost = speed_data['actual_cost'].mean()
-            avg_input_tokens = speed_data['input_tokens'].mean()
-            avg_output_tokens = speed_data['output_tokens'].mean()
-            avg_duration_reduction = speed_data['duration_reduction'].mean()
-            
-            report += f"| {speed}x | {avg_wer:.3f} | ${avg_cost:.4f} | {avg_input_tokens:,.0f} | {avg_output_tokens:,.0f} | {avg_duration_reduction:.1f}% |\n"
+"""]
+        
+        for row in summary.itertuples():
+            parts.append(f"| {row.Index}x | {row.wer:.3f} | ${row.actual_cost:.4f} | {row.input_tokens:,.0f} | {row.output_tokens:,.0f} | {row.duration_reduction:.1f}% |\n")
         
-        report += f"""
+        parts.append("""
 ## Recommendations
 
 Based on the test results:
-"""
-        
-        best_speed = clean_df.groupby('speed_factor').agg({
-            'wer': 'mean',
-            'cost_savings': 'mean'
-        })
+""")
         
         acceptable_wer_threshold = 0.15
-        good_speeds = best_speed[best_speed['wer'] < acceptable_wer_threshold]
+        good_speeds = summary[summary['wer'] < acceptable_wer_threshold]
         
         if not good_speeds.empty:
             optimal_speed = good_speeds['cost_savings'].idxmax()
-            report += f"""
+            parts.append(f"""
 - **Recommended Speed**: {optimal_speed}x
-- **Expected WER**: {best_speed.loc[optimal_speed, 'wer']:.3f}
-- **Expected Cost Savings**: {best_speed.loc[optimal_speed, 'cost_savings']:.1f}%
-"""
+- **Expected WER**: {summary.loc[optimal_speed, 'wer']:.3f}
+- **Expected Cost Savings**: {summary.loc[optimal_speed, 'cost_savings']:.1f}%
+""")
         else:
-            report += "\n- All tested speeds resulted in WER above acceptable threshold (15%)\n"
+            parts.append("\n- All tested speeds resulted in WER above acceptable threshold (15%)\n")
         
-        report += """
+        parts.append("""
 ## Detailed Results by File
 
-"""
+""")
         
-        for file_name in clean_df['file_name'].unique():
-            file_data = clean_df[clean_df['file_name'] == file_name]
-            report += f"### {file_name}\n\n"
-            report += "| Speed | WER | Cost Savings | Processing Time |\n"
-            report += "|-------|-----|--------------|----------------|\n"
+        for file_name, file_data in clean_df.groupby('file_name', sort=False):
+            parts.append(f"### {file_name}\n\n")
+            parts.append("| Speed | WER | Cost Savings | Processing Time |\n")
+            parts.append("|-------|-----|--------------|----------------|\n")
             
-            for _, row in file_data.iterrows():
-                report += f"| {row['speed_factor']}x | {row['wer']:.3f} | {row['cost_savings']:.1f}% | {row['processing_time']:.2f}s |\n"
+            for row in file_data.itertuples(index=False):
+                parts.append(f"| {row.speed_factor}x | {row.wer:.3f} | {row.cost_savings:.1f}% | {row.processing_time:.2f}s |\n")
             
-            report += "\n"
+            parts.append("\n")
         
-        report_path = os.path.join(self.results_dir, f"test_report_{self.timestamp}.md")
+        report = ''.join(parts)
+        
+        report_path = self.results_dir / f"test_report_{self.timestamp}.md"
         with open(report_path, 'w') as f:
             f.write(report)
         
@@ -279,6 +431,8 @@ def main():
                        help='Speed factors to test (default: 1.0, 2.0, 3.0)')
     parser.add_argument('--single-file', type=str, help='Test a single file only')
     parser.add_argument('--no-viz', action='store_true', help='Skip visualization generation')
+    parser.add_argument('--csv', action='store_true', help='Also save results as CSV')
+    parser.add_argument('--resume', type=str, help='Results journal (CSV) of an interrupted run to resume')
     
     args = parser.parse_args()
     
@@ -289,21 +443,24 @@ def main():
         sys.exit(1)
     
     logger.info("Starting GPT-4o audio performance tests...")
-    df = tester.run_full_test(speed_factors=args.speeds)
+    df = tester.run_full_test(speed_factors=args.speeds, resume_path=args.resume)
     
     if df.empty:
         logger.error("No test results generated")
         sys.exit(1)
     
-    csv_path = tester.save_results(df)
+    results_path = tester.save_results(df, write_csv=args.csv)
+    
+    # Aggregate once and share between the plots and the report
+    summaries = tester._compute_summaries(df)
     
-    if not args.no_viz and not df[~df['wer'].isna()].empty:
-        plot_path = tester.generate_visualizations(df)
+    if not args.no_viz and not summaries['clean_df'].empty:
+        plot_path = tester.generate_visualizations(df, summaries)
     
-    report_path = tester.generate_report(df)
+    report_path = tester.generate_report(df, summaries)
     
     logger.info("Test completed successfully!")
-    logger.info(f"Results: {csv_path}")
+    logger.info(f"Results: {results_path}")
     logger.info(f"Report: {report_path}")
 
 
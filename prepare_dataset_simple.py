@@ -4,7 +4,7 @@ Simplified dataset preparation focusing on reliable sources with verified transc
 """
 
 import os
-import json
+import orjson
 import logging
 import subprocess
 from pathlib import Path
@@ -182,8 +182,8 @@ here are recommended sources for obtaining test samples:
         }
         
         # Save instructions and sample list
-        with open(self.data_dir / 'dataset_preparation_guide.json', 'w') as f:
-            json.dump(samples_info, f, indent=2)
+        with open(self.data_dir / 'dataset_preparation_guide.json', 'wb') as f:
+            f.write(orjson.dumps(samples_info, option=orjson.OPT_INDENT_2))
         
         # Create example transcript files
         for sample in samples_info['samples']:
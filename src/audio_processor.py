@@ -1,18 +1,81 @@
+import io
 import os
+import av
+import hashlib
 import ffmpeg
+from fractions import Fraction
 from pathlib import Path
 import logging
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+from av.audio.resampler import AudioResampler
 from src.config import Config
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_CHANNEL_LAYOUTS = {1: 'mono', 2: 'stereo'}
+
+
+def _bitrate_bps(bitrate: str) -> int:
+    """Convert an ffmpeg-style bitrate such as '64k' to bits per second."""
+    if bitrate[-1].lower() == 'k':
+        return int(float(bitrate[:-1]) * 1000)
+    return int(bitrate)
+
 
 class AudioProcessor:
     def __init__(self):
         self.temp_dir = Config.TEMP_DIR
         os.makedirs(self.temp_dir, exist_ok=True)
+        # Probe results keyed by (path, mtime_ns, size) so edited files are re-probed
+        self._probe_cache: Dict[Tuple[str, int, int], Dict] = {}
+        # Processed outputs keyed by (input path, mtime_ns, size, speed factor)
+        self._processed: Dict[Tuple[str, int, int, float], str] = {}
+    
+    def _build_stream(self, input_path: str, speed_factor: float, output: str, **output_kwargs):
+        """Build the ffmpeg graph that re-encodes input to mp3 at the given speed."""
+        stream = ffmpeg.input(str(input_path))
+        
+        if speed_factor != 1.0:
+            stream = ffmpeg.filter(stream, 'atempo', speed_factor)
+        
+        return ffmpeg.output(
+            stream,
+            output,
+            acodec='libmp3lame',
+            audio_bitrate=Config.AUDIO_BITRATE,
+            ac=Config.AUDIO_CHANNELS,
+            ar=Config.AUDIO_SAMPLE_RATE,
+            **output_kwargs
+        )
+    
+    def _probe(self, audio_path: str) -> Dict:
+        """Run ffprobe on a file, reusing the result until the file changes."""
+        stat = os.stat(audio_path)
+        key = (str(audio_path), stat.st_mtime_ns, stat.st_size)
+        probe = self._probe_cache.get(key)
+        if probe is None:
+            probe = ffmpeg.probe(str(audio_path))
+            self._probe_cache[key] = probe
+        return probe
+    
+    def _matches_output_format(self, input_path: str) -> bool:
+        """Whether the input's audio is already mp3 in the configured rate, channels and bitrate."""
+        try:
+            probe = self._probe(input_path)
+        except Exception as e:
+            logger.debug(f"Could not probe {input_path}, re-encoding instead of copying: {e}")
+            return False
+        stream = next((s for s in probe['streams'] if s.get('codec_type') == 'audio'), None)
+        if stream is None:
+            return False
+        return (
+            stream.get('codec_name') == 'mp3'
+            and int(stream.get('sample_rate', 0)) == Config.AUDIO_SAMPLE_RATE
+            and stream.get('channels') == Config.AUDIO_CHANNELS
+            and int(stream.get('bit_rate', 0)) <= _bitrate_bps(Config.AUDIO_BITRATE)
+        )
     
     def process_audio(self, input_path: str, speed_factor: float = 1.0) -> str:
         """
@@ -25,31 +88,34 @@ class AudioProcessor:
         Returns:
             Path to processed audio file
         """
+        stat = os.stat(input_path)
+        key = (str(input_path), stat.st_mtime_ns, stat.st_size, speed_factor)
+        cached = self._processed.get(key)
+        if cached is not None and os.path.exists(cached):
+            return cached
+        
         input_path = Path(input_path)
         
-        output_filename = f"{input_path.stem}_speed_{speed_factor}x.mp3"
+        # The path hash keeps inputs sharing a stem (a.mp3 and a.wav, or the
+        # same name in two directories) from writing to the same temp file
+        path_hash = hashlib.blake2b(str(input_path.resolve()).encode('utf-8'), digest_size=4).hexdigest()
+        output_filename = f"{input_path.stem}_{path_hash}_speed_{speed_factor}x.mp3"
         output_path = os.path.join(self.temp_dir, output_filename)
         
         logger.info(f"Processing {input_path.name} at {speed_factor}x speed")
         
         try:
-            stream = ffmpeg.input(str(input_path))
-            
-            if speed_factor != 1.0:
-                stream = ffmpeg.filter(stream, 'atempo', speed_factor)
-            
-            stream = ffmpeg.output(
-                stream,
-                output_path,
-                acodec='libmp3lame',
-                audio_bitrate=Config.AUDIO_BITRATE,
-                ac=Config.AUDIO_CHANNELS,
-                ar=Config.AUDIO_SAMPLE_RATE
-            )
-            
+            if speed_factor == 1.0 and self._matches_output_format(input_path):
+                # Nothing to change, so remux the audio stream instead of re-encoding it.
+                # main.py sends 1.0x originals to the API directly, so only direct
+                # callers of process_audio take this path
+                stream = ffmpeg.output(ffmpeg.input(str(input_path)).audio, output_path, acodec='copy')
+            else:
+                stream = self._build_stream(input_path, speed_factor, output_path)
             ffmpeg.run(stream, overwrite_output=True, quiet=True)
             
             logger.info(f"Successfully processed audio to: {output_path}")
+            self._processed[key] = output_path
             return output_path
             
         except ffmpeg.Error as e:
@@ -59,27 +125,164 @@ class AudioProcessor:
             logger.error(f"Error processing audio: {str(e)}")
             raise
     
-    def get_audio_info(self, audio_path: str) -> Tuple[float, int]:
+    def _decode_pcm(self, input_path: str) -> List[av.AudioFrame]:
+        """Decode an audio file in-process to PCM frames in the output rate and layout."""
+        # Downmixing and resampling before atempo means every speed factor
+        # filters the smaller output-format signal decoded here once
+        resampler = AudioResampler(
+            format='s16',
+            layout=_CHANNEL_LAYOUTS[Config.AUDIO_CHANNELS],
+            rate=Config.AUDIO_SAMPLE_RATE
+        )
+        frames = []
+        with av.open(str(input_path)) as container:
+            for frame in container.decode(audio=0):
+                frames.extend(resampler.resample(frame))
+        frames.extend(resampler.resample(None))
+        return frames
+    
+    def _encode_pcm(self, frames: List[av.AudioFrame], speed_factor: float, name: str) -> bytes:
+        """Run decoded PCM frames through atempo and encode them to mp3 in memory."""
+        logger.info(f"Processing {name} at {speed_factor}x speed (in memory)")
+        
+        try:
+            graph = None
+            if speed_factor != 1.0:
+                graph = av.filter.Graph()
+                source = graph.add_abuffer(
+                    format='s16',
+                    layout=_CHANNEL_LAYOUTS[Config.AUDIO_CHANNELS],
+                    sample_rate=Config.AUDIO_SAMPLE_RATE,
+                    time_base=Fraction(1, Config.AUDIO_SAMPLE_RATE)
+                )
+                graph.link_nodes(source, graph.add('atempo', str(speed_factor)), graph.add('abuffersink'))
+                graph.configure()
+            
+            buffer = io.BytesIO()
+            with av.open(buffer, 'w', format='mp3') as output:
+                stream = output.add_stream('libmp3lame', rate=Config.AUDIO_SAMPLE_RATE)
+                stream.layout = _CHANNEL_LAYOUTS[Config.AUDIO_CHANNELS]
+                stream.bit_rate = _bitrate_bps(Config.AUDIO_BITRATE)
+                
+                def encode(frame: Optional[av.AudioFrame]):
+                    for packet in stream.encode(frame):
+                        output.mux(packet)
+                
+                def drain():
+                    while True:
+                        try:
+                            encode(graph.pull())
+                        except (av.BlockingIOError, av.EOFError):
+                            return
+                
+                for frame in frames:
+                    if graph is None:
+                        encode(frame)
+                    else:
+                        graph.push(frame)
+                        drain()
+                if graph is not None:
+                    graph.push(None)
+                    drain()
+                encode(None)
+            
+            audio_bytes = buffer.getvalue()
+            logger.info(f"Successfully processed {name} ({len(audio_bytes)} bytes)")
+            return audio_bytes
+            
+        except av.FFmpegError as e:
+            logger.error(f"PyAV error: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Error processing audio: {str(e)}")
+            raise
+    
+    def process_audio_to_bytes(self, input_path: str, speed_factor: float = 1.0) -> bytes:
+        """
+        Process audio file with specified speed factor, keeping the result in memory.
+        
+        Args:
+            input_path: Path to input audio file
+            speed_factor: Speed multiplication factor (1.0 = normal, 2.0 = 2x speed)
+        
+        Returns:
+            Processed mp3 data, decoded, filtered and encoded in-process with PyAV
+        """
+        return self._encode_pcm(self._decode_pcm(input_path), speed_factor, Path(input_path).name)
+    
+    def process_audio_batch(self, input_path: str, speed_factors: List[float],
+                            to_bytes: bool = False) -> List[Union[str, bytes, Exception]]:
+        """
+        Process one audio file at several speed factors in parallel.
+        
+        Args:
+            input_path: Path to input audio file
+            speed_factors: Speed multiplication factors to produce
+            to_bytes: Return the processed mp3 data instead of temp file paths
+        
+        Returns:
+            Processed audio (paths, or bytes with to_bytes) in input order;
+            a failed variant is returned as its exception instead
+        """
+        if not speed_factors:
+            return []
+        
+        if to_bytes:
+            # Decode once in-process and reuse the PCM for every speed factor
+            try:
+                frames = self._decode_pcm(input_path)
+            except Exception as e:
+                logger.error(f"Error decoding {input_path}: {str(e)}")
+                return [e] * len(speed_factors)
+            
+            def process_one(input_path: str, speed_factor: float) -> bytes:
+                return self._encode_pcm(frames, speed_factor, Path(input_path).name)
+        else:
+            process_one = self.process_audio
+        
+        def process(speed_factor: float) -> Union[str, bytes, Exception]:
+            try:
+                return process_one(input_path, speed_factor)
+            except Exception as e:
+                return e
+        
+        # Variants are separate ffmpeg subprocesses or PyAV encodes, both of
+        # which run outside the interpreter's own bytecode loop
+        max_workers = min(len(speed_factors), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(process, speed_factors))
+    
+    def _bytes_duration(self, audio_bytes: bytes) -> float:
+        """Measure the duration of in-memory encoded audio by demuxing it with PyAV."""
+        with av.open(io.BytesIO(audio_bytes)) as container:
+            if container.duration is not None:
+                return container.duration / av.time_base
+            # No duration in the header; sum packet durations (demux only, no decoding)
+            stream = container.streams.audio[0]
+            return float(sum(packet.duration or 0 for packet in container.demux(stream)) * stream.time_base)
+    
+    def get_audio_info(self, audio_path: Union[str, bytes]) -> Tuple[float, int]:
         """
         Get audio duration and file size.
         
         Args:
-            audio_path: Path to audio file
+            audio_path: Path to audio file, or in-memory encoded audio data
         
         Returns:
             Tuple of (duration_seconds, file_size_bytes)
         """
         try:
-            probe = ffmpeg.probe(audio_path)
-            duration = float(probe['format']['duration'])
-            size = int(probe['format']['size'])
-            return duration, size
+            if isinstance(audio_path, bytes):
+                return self._bytes_duration(audio_path), len(audio_path)
+            probe = self._probe(audio_path)
+            return float(probe['format']['duration']), int(probe['format']['size'])
         except Exception as e:
             logger.error(f"Error getting audio info: {str(e)}")
             raise
     
     def cleanup_temp_files(self):
         """Remove all temporary files."""
+        self._processed.clear()
         temp_path = Path(self.temp_dir)
         if temp_path.exists():
             for file in temp_path.glob("*"):
@@ -25,6 +25,24 @@ class Config:
     
     MAX_FILE_SIZE_MB = 25
     
+    # On-disk cache of WER metrics keyed by transcript content hashes
+    WER_CACHE_PATH = os.path.join(RESULTS_DIR, ".wer_cache.json")
+    
+    # Character-level alignment costs several times the word-level one and no
+    # plot or report reads CER, so it is only computed when enabled
+    COMPUTE_CER = False
+    
+    # Maximum number of files tested at once; each file submits all of its
+    # speed variants for transcription together
+    MAX_CONCURRENCY = 4
+    
+    # Pooled HTTP connections to the API, shared by every request of a run;
+    # enough for MAX_CONCURRENCY files with all their speed variants in flight
+    MAX_API_CONNECTIONS = 16
+    # Keep idle connections open while the next file's audio is preprocessed,
+    # so its requests reuse them instead of reconnecting
+    API_KEEPALIVE_SECONDS = 60.0
+    
     # GPT-4o pricing (per million tokens)
     GPT4O_INPUT_COST_PER_M = 100.0  # $100 per 1M input tokens
     GPT4O_OUTPUT_COST_PER_M = 200.0  # $200 per 1M output tokens
\ No newline at end of file
@@ -1,6 +1,9 @@
 import os
-import json
+import mmap
+import orjson
 import logging
+import functools
+from dataclasses import asdict, dataclass
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 
@@ -9,6 +12,49 @@ from src.config import Config
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.m4a')
+
+
+@functools.lru_cache(maxsize=64)
+def _load_txt(transcript_path: str, mtime_ns: int, size: int) -> str:
+    """Read a text transcript; mtime and size key the cache so edited files are re-read."""
+    if size == 0:
+        return ''
+    with open(transcript_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # Decode straight from the mapping, skipping an intermediate bytes copy
+            return str(mm, 'utf-8').strip()
+
+
+@functools.lru_cache(maxsize=64)
+def _load_json(transcript_path: str, mtime_ns: int, size: int) -> str:
+    """Read a JSON transcript; cached like _load_txt."""
+    if size == 0:
+        raise ValueError(f"Empty JSON transcript: {transcript_path}")
+    with open(transcript_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # orjson parses straight from the mapping's buffer
+            with memoryview(mm) as view:
+                data = orjson.loads(view)
+    if isinstance(data, str):
+        return data
+    elif isinstance(data, dict):
+        return data.get('text', data.get('transcript', ''))
+    else:
+        raise ValueError(f"Unexpected JSON format in {transcript_path}")
+
+
+@dataclass(slots=True, frozen=True)
+class DatasetItem:
+    """One audio file paired with its reference transcript."""
+    name: str
+    audio_path: str
+    transcript_path: str
+    
+    def to_dict(self) -> Dict[str, str]:
+        """Return the item as a plain dict, e.g. for JSON output."""
+        return asdict(self)
+
 
 class DatasetManager:
     def __init__(self):
@@ -21,39 +67,42 @@ class DatasetManager:
         os.makedirs(self.audio_dir, exist_ok=True)
         os.makedirs(self.transcript_dir, exist_ok=True)
     
-    def get_dataset_items(self) -> List[Dict[str, str]]:
+    def get_dataset_items(self) -> List[DatasetItem]:
         """
         Get all dataset items with their audio and transcript paths.
         
         Returns:
-            List of dictionaries with 'name', 'audio_path', and 'transcript_path'
+            List of DatasetItem with name, audio_path and transcript_path
         """
         items = []
         
-        audio_files = list(Path(self.audio_dir).glob("*.mp3")) + \
-                     list(Path(self.audio_dir).glob("*.wav")) + \
-                     list(Path(self.audio_dir).glob("*.m4a"))
+        # One directory scan each; transcript lookups are then set membership
+        # tests instead of two exists() syscalls per audio file
+        with os.scandir(self.audio_dir) as entries:
+            audio_names = [
+                entry.name for entry in entries
+                if entry.is_file() and entry.name.lower().endswith(AUDIO_EXTENSIONS)
+            ]
+        with os.scandir(self.transcript_dir) as entries:
+            transcript_names = {entry.name for entry in entries if entry.is_file()}
         
-        for audio_path in audio_files:
-            base_name = audio_path.stem
-            
-            transcript_txt = Path(self.transcript_dir) / f"{base_name}.txt"
-            transcript_json = Path(self.transcript_dir) / f"{base_name}.json"
+        for audio_name in audio_names:
+            base_name = os.path.splitext(audio_name)[0]
             
-            transcript_path = None
-            if transcript_txt.exists():
-                transcript_path = str(transcript_txt)
-            elif transcript_json.exists():
-                transcript_path = str(transcript_json)
+            transcript_name = None
+            if f"{base_name}.txt" in transcript_names:
+                transcript_name = f"{base_name}.txt"
+            elif f"{base_name}.json" in transcript_names:
+                transcript_name = f"{base_name}.json"
             
-            if transcript_path:
-                items.append({
-                    'name': base_name,
-                    'audio_path': str(audio_path),
-                    'transcript_path': transcript_path
-                })
+            if transcript_name:
+                items.append(DatasetItem(
+                    name=base_name,
+                    audio_path=os.path.join(self.audio_dir, audio_name),
+                    transcript_path=os.path.join(self.transcript_dir, transcript_name)
+                ))
             else:
-                logger.warning(f"No transcript found for {audio_path.name}")
+                logger.warning(f"No transcript found for {audio_name}")
         
         logger.info(f"Found {len(items)} complete dataset items")
         return items
@@ -71,27 +120,20 @@ class DatasetManager:
         path = Path(transcript_path)
         
         if path.suffix == '.txt':
-            with open(path, 'r', encoding='utf-8') as f:
-                return f.read().strip()
-        
+            loader = _load_txt
         elif path.suffix == '.json':
-            with open(path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                if isinstance(data, str):
-                    return data
-                elif isinstance(data, dict):
-                    return data.get('text', data.get('transcript', ''))
-                else:
-                    raise ValueError(f"Unexpected JSON format in {transcript_path}")
-        
+            loader = _load_json
         else:
             raise ValueError(f"Unsupported transcript format: {path.suffix}")
+        
+        stat = os.stat(path)
+        return loader(str(path), stat.st_mtime_ns, stat.st_size)
     
     def save_dataset_metadata(self, metadata: Dict):
         """Save dataset metadata to JSON file."""
         metadata_path = os.path.join(Config.DATA_DIR, 'dataset_metadata.json')
-        with open(metadata_path, 'w') as f:
-            json.dump(metadata, f, indent=2)
+        with open(metadata_path, 'wb') as f:
+            f.write(orjson.dumps(metadata, option=orjson.OPT_INDENT_2))
         logger.info(f"Saved metadata to {metadata_path}")
     
     def validate_dataset(self) -> Tuple[bool, List[str]]:
@@ -109,16 +151,16 @@ class DatasetManager:
             return False, issues
         
         for item in items:
-            audio_path = Path(item['audio_path'])
+            audio_path = Path(item.audio_path)
             if not audio_path.exists():
                 issues.append(f"Audio file missing: {audio_path}")
             
             try:
-                transcript = self.load_transcript(item['transcript_path'])
+                transcript = self.load_transcript(item.transcript_path)
                 if len(transcript.strip()) == 0:
-                    issues.append(f"Empty transcript: {item['transcript_path']}")
+                    issues.append(f"Empty transcript: {item.transcript_path}")
             except Exception as e:
-                issues.append(f"Error loading transcript {item['transcript_path']}: {str(e)}")
+                issues.append(f"Error loading transcript {item.transcript_path}: {str(e)}")
         
         is_valid = len(issues) == 0
         return is_valid, issues
\ No newline at end of file
@@ -1,28 +1,193 @@
 import os
+import mmap
 import time
+import asyncio
 import logging
-import base64
-from typing import Dict, Optional, Tuple
-from openai import OpenAI
+import binascii
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Union
+import httpx
+from openai import OpenAI, AsyncOpenAI, DefaultHttpxClient, DefaultAsyncHttpxClient
 from src.config import Config
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# API audio format for each supported file extension; anything else is sent as mp3
+_EXT_TO_FORMAT = {'.mp3': 'mp3', '.wav': 'wav', '.wave': 'wav', '.m4a': 'mp4'}
+
+
+# Base64 audio keyed by (path, mtime_ns, size) so edited files are re-read;
+# an LRU guarded by a lock since encoding runs in worker threads. It is bounded
+# by total size rather than entry count: one file at the API's 25MB limit
+# encodes to ~33MB, so this holds at most one such file at a time
+_ENCODE_CACHE_MAX_CHARS = 40 * 1024 * 1024
+_encode_cache: 'OrderedDict[Tuple[str, int, int], str]' = OrderedDict()
+_encode_cache_chars = 0
+_encode_cache_lock = threading.Lock()
+
+
+def _encode_fd(audio_path: str, fd: int, stat: os.stat_result) -> str:
+    """Base64-encode an already-open audio file, reusing the result until the file changes."""
+    key = (audio_path, stat.st_mtime_ns, stat.st_size)
+    with _encode_cache_lock:
+        cached = _encode_cache.get(key)
+        if cached is not None:
+            _encode_cache.move_to_end(key)
+            return cached
+    
+    if stat.st_size == 0:
+        encoded = ''
+    else:
+        # Encode straight from a read-only mapping of the open descriptor so
+        # the file is never copied into an intermediate bytes object first
+        with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+            encoded = _b64_ascii(mm)
+    
+    global _encode_cache_chars
+    if len(encoded) <= _ENCODE_CACHE_MAX_CHARS:
+        with _encode_cache_lock:
+            if key not in _encode_cache:
+                _encode_cache[key] = encoded
+                _encode_cache_chars += len(encoded)
+            while _encode_cache_chars > _ENCODE_CACHE_MAX_CHARS:
+                _, evicted = _encode_cache.popitem(last=False)
+                _encode_cache_chars -= len(evicted)
+    return encoded
+
+
+def _b64_ascii(data) -> str:
+    """Base64-encode a bytes-like object to str."""
+    # A single b2a_base64 call sizes its output exactly up front, so there is
+    # no growing buffer to preallocate; encoding in chunks into a presized
+    # bytearray measured slower than this one C pass
+    return binascii.b2a_base64(data, newline=False).decode('ascii')
+
 
 class GPT4OTranscriber:
     def __init__(self):
         if not Config.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY not found in environment variables")
         
-        self.client = OpenAI(api_key=Config.OPENAI_API_KEY)
+        # Pool limits for the async client of a run (see async_client) and the
+        # blocking client, so requests reuse connections and their TLS sessions
+        self._limits = httpx.Limits(
+            max_connections=Config.MAX_API_CONNECTIONS,
+            max_keepalive_connections=Config.MAX_API_CONNECTIONS,
+            keepalive_expiry=Config.API_KEEPALIVE_SECONDS
+        )
+        self._client: Optional[OpenAI] = None
         self.model = Config.GPT4O_MODEL
     
-    def _encode_audio_to_base64(self, audio_path: str) -> str:
-        """Encode audio file to base64 string."""
-        with open(audio_path, 'rb') as audio_file:
-            audio_data = audio_file.read()
-            return base64.b64encode(audio_data).decode('utf-8')
+    def clear_encoding_cache(self):
+        """Drop cached base64 audio, e.g. once the processed files are deleted."""
+        global _encode_cache_chars
+        with _encode_cache_lock:
+            _encode_cache.clear()
+            _encode_cache_chars = 0
+    
+    def _check_size(self, size_bytes: int, name: str) -> float:
+        """Reject audio over the API's size limit and return its size in MB."""
+        file_size_mb = size_bytes / (1024 * 1024)
+        
+        if file_size_mb > Config.MAX_FILE_SIZE_MB:
+            raise ValueError(f"File size {file_size_mb:.2f}MB exceeds maximum of {Config.MAX_FILE_SIZE_MB}MB")
+        
+        logger.info(f"Transcribing {name} ({file_size_mb:.2f}MB)")
+        return file_size_mb
+    
+    def _prepare_input(self, audio_input: Union[str, bytes],
+                       audio_format: str = 'mp3') -> Tuple[str, str, float]:
+        """
+        Validate an audio input and encode it for the API.
+        
+        Args:
+            audio_input: Path to an audio file, or in-memory encoded audio data
+            audio_format: Format of in-memory data (file formats come from the extension)
+        
+        Returns:
+            Tuple of (audio_base64, audio_format, file_size_mb)
+        """
+        if isinstance(audio_input, bytes):
+            file_size_mb = self._check_size(len(audio_input), "in-memory audio")
+            return _b64_ascii(audio_input), audio_format, file_size_mb
+        
+        # One descriptor serves the size check, the cache key and the mapping
+        fd = os.open(audio_input, os.O_RDONLY)
+        try:
+            stat = os.fstat(fd)
+            file_size_mb = self._check_size(stat.st_size, os.path.basename(audio_input))
+            audio_base64 = _encode_fd(str(audio_input), fd, stat)
+        finally:
+            os.close(fd)
+        
+        # Determine audio format from file extension
+        audio_format = _EXT_TO_FORMAT.get(os.path.splitext(audio_input)[1].lower(), 'mp3')
+        
+        return audio_base64, audio_format, file_size_mb
+    
+    def _build_messages(self, audio_base64: str, audio_format: str,
+                        language: Optional[str]) -> List[Dict]:
+        """Build the chat messages asking the model to transcribe the audio."""
+        # Prepare the transcription prompt
+        prompt = "Please transcribe this audio file accurately. Provide only the transcription without any additional commentary."
+        if language:
+            prompt += f" The audio is in {language}."
+        
+        # Call GPT-4o with audio
+        return [
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": prompt},
+                    {
+                        "type": "input_audio",
+                        "input_audio": {
+                            "data": audio_base64,
+                            "format": audio_format
+                        }
+                    }
+                ]
+            }
+        ]
+    
+    def _parse_response(self, response, file_size_mb: float, language: Optional[str],
+                        start_time: float) -> Tuple[str, Dict]:
+        """Extract the transcription and usage/cost metadata from a completion."""
+        end_time = time.time()
+        processing_time = end_time - start_time
+        
+        # Extract transcription from response
+        transcription = response.choices[0].message.content
+        
+        # Calculate token usage and costs
+        input_tokens = response.usage.prompt_tokens if response.usage else 0
+        output_tokens = response.usage.completion_tokens if response.usage else 0
+        total_tokens = response.usage.total_tokens if response.usage else 0
+        
+        input_cost = (input_tokens / 1_000_000) * Config.GPT4O_INPUT_COST_PER_M
+        output_cost = (output_tokens / 1_000_000) * Config.GPT4O_OUTPUT_COST_PER_M
+        total_cost = input_cost + output_cost
+        
+        metadata = {
+            "processing_time": processing_time,
+            "file_size_mb": file_size_mb,
+            "model": self.model,
+            "language": language,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": total_tokens,
+            "input_cost": input_cost,
+            "output_cost": output_cost,
+            "total_cost": total_cost
+        }
+        
+        logger.info(f"Transcription completed in {processing_time:.2f}s")
+        logger.info(f"Tokens used: {input_tokens} input, {output_tokens} output")
+        logger.info(f"Cost: ${total_cost:.4f}")
+        
+        return transcription, metadata
     
     def transcribe(self, audio_path: str, language: Optional[str] = None) -> Tuple[str, Dict]:
         """
@@ -35,96 +200,128 @@ class GPT4OTranscriber:
         Returns:
             Tuple of (transcription_text, metadata_dict)
         """
-        file_size_mb = os.path.getsize(audio_path) / (1024 * 1024)
-        
-        if file_size_mb > Config.MAX_FILE_SIZE_MB:
-            raise ValueError(f"File size {file_size_mb:.2f}MB exceeds maximum of {Config.MAX_FILE_SIZE_MB}MB")
+        return self._transcribe_sync(audio_path, language)
+    
+    def transcribe_bytes(self, audio_bytes: bytes, audio_format: str = 'mp3',
+                         language: Optional[str] = None) -> Tuple[str, Dict]:
+        """
+        Transcribe in-memory audio using GPT-4o audio model.
         
-        logger.info(f"Transcribing {os.path.basename(audio_path)} ({file_size_mb:.2f}MB)")
+        Args:
+            audio_bytes: Encoded audio data (e.g. ffmpeg output piped from AudioProcessor)
+            audio_format: Audio format of the data ('mp3', 'wav' or 'mp4')
+            language: Optional language code (e.g., 'en')
         
+        Returns:
+            Tuple of (transcription_text, metadata_dict)
+        """
+        return self._transcribe_sync(audio_bytes, language, audio_format)
+    
+    def _transcribe_sync(self, audio_input: Union[str, bytes], language: Optional[str],
+                         audio_format: str = 'mp3') -> Tuple[str, Dict]:
+        """Transcribe one audio input with a blocking request."""
         start_time = time.time()
         
         try:
-            # Encode audio to base64
-            audio_base64 = self._encode_audio_to_base64(audio_path)
-            
-            # Determine audio format from file extension
-            audio_format = os.path.splitext(audio_path)[1].lower().replace('.', '')
-            if audio_format == 'mp3':
-                audio_format = 'mp3'
-            elif audio_format in ['wav', 'wave']:
-                audio_format = 'wav'
-            elif audio_format == 'm4a':
-                audio_format = 'mp4'
-            else:
-                audio_format = 'mp3'  # Default to mp3
-            
-            # Prepare the transcription prompt
-            prompt = "Please transcribe this audio file accurately. Provide only the transcription without any additional commentary."
-            if language:
-                prompt += f" The audio is in {language}."
-            
-            # Call GPT-4o with audio
-            messages = [
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {
-                            "type": "input_audio",
-                            "input_audio": {
-                                "data": audio_base64,
-                                "format": audio_format
-                            }
-                        }
-                    ]
-                }
-            ]
+            audio_base64, audio_format, file_size_mb = self._prepare_input(audio_input, audio_format)
             
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=messages,
+                messages=self._build_messages(audio_base64, audio_format, language),
                 max_tokens=16384  # Adjust based on expected transcript length
             )
             
-            end_time = time.time()
-            processing_time = end_time - start_time
-            
-            # Extract transcription from response
-            transcription = response.choices[0].message.content
-            
-            # Calculate token usage and costs
-            input_tokens = response.usage.prompt_tokens if response.usage else 0
-            output_tokens = response.usage.completion_tokens if response.usage else 0
-            total_tokens = response.usage.total_tokens if response.usage else 0
-            
-            input_cost = (input_tokens / 1_000_000) * Config.GPT4O_INPUT_COST_PER_M
-            output_cost = (output_tokens / 1_000_000) * Config.GPT4O_OUTPUT_COST_PER_M
-            total_cost = input_cost + output_cost
-            
-            metadata = {
-                "processing_time": processing_time,
-                "file_size_mb": file_size_mb,
-                "model": self.model,
-                "language": language,
-                "input_tokens": input_tokens,
-                "output_tokens": output_tokens,
-                "total_tokens": total_tokens,
-                "input_cost": input_cost,
-                "output_cost": output_cost,
-                "total_cost": total_cost
-            }
-            
-            logger.info(f"Transcription completed in {processing_time:.2f}s")
-            logger.info(f"Tokens used: {input_tokens} input, {output_tokens} output")
-            logger.info(f"Cost: ${total_cost:.4f}")
-            
-            return transcription, metadata
+            return self._parse_response(response, file_size_mb, language, start_time)
             
         except Exception as e:
             logger.error(f"Transcription error: {str(e)}")
             raise
     
+    async def _transcribe_async(self, aclient: AsyncOpenAI, audio_input: Union[str, bytes],
+                                language: Optional[str], semaphore: asyncio.Semaphore) -> Tuple[str, Dict]:
+        """Transcribe one audio input over the async client."""
+        async with semaphore:
+            start_time = time.time()
+            
+            try:
+                # Encoding is CPU-bound, so keep it off the event loop
+                audio_base64, audio_format, file_size_mb = await asyncio.to_thread(
+                    self._prepare_input, audio_input
+                )
+                
+                response = await aclient.chat.completions.create(
+                    model=self.model,
+                    messages=self._build_messages(audio_base64, audio_format, language),
+                    max_tokens=16384  # Adjust based on expected transcript length
+                )
+                
+                return self._parse_response(response, file_size_mb, language, start_time)
+                
+            except Exception as e:
+                logger.error(f"Transcription error: {str(e)}")
+                raise
+    
+    def async_client(self) -> AsyncOpenAI:
+        """
+        Create a pooled async client for use with transcribe_many.
+        
+        httpx's async pool is bound to the event loop it first runs on, so call
+        this inside the running loop, share the client across every
+        transcribe_many call of that run, and close it before the loop ends.
+        
+        Returns:
+            AsyncOpenAI client whose connections are reused across requests
+        """
+        return AsyncOpenAI(
+            api_key=Config.OPENAI_API_KEY,
+            http_client=DefaultAsyncHttpxClient(limits=self._limits)
+        )
+    
+    async def transcribe_many(self, audio_inputs: List[Union[str, bytes]], language: Optional[str] = None,
+                              concurrency: int = 8,
+                              client: Optional[AsyncOpenAI] = None) -> List[Union[Tuple[str, Dict], Exception]]:
+        """
+        Transcribe several audio inputs concurrently with the async client.
+        
+        Args:
+            audio_inputs: Audio file paths or in-memory mp3 data (e.g. the speed
+                variants of one recording)
+            language: Optional language code (e.g., 'en')
+            concurrency: Maximum number of requests in flight at once
+            client: Client from async_client() shared across calls; the caller
+                closes it. Without one, a client is opened and closed for this call
+        
+        Returns:
+            List of (transcription_text, metadata_dict) tuples in input order;
+            a failed transcription is returned as its exception instead
+        """
+        if client is None:
+            async with self.async_client() as own_client:
+                return await self.transcribe_many(audio_inputs, language, concurrency, own_client)
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        return await asyncio.gather(
+            *(self._transcribe_async(client, audio_input, language, semaphore)
+              for audio_input in audio_inputs),
+            return_exceptions=True
+        )
+    
+    @property
+    def client(self) -> OpenAI:
+        """Pooled blocking client, created on first use and again after close()."""
+        if self._client is None:
+            self._client = OpenAI(
+                api_key=Config.OPENAI_API_KEY,
+                http_client=DefaultHttpxClient(limits=self._limits)
+            )
+        return self._client
+    
+    def close(self):
+        """Close the pooled HTTP connections of the blocking client."""
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+    
     def estimate_cost(self, audio_size_mb: float, expected_transcript_words: int = 10000) -> float:
         """
         Estimate transcription cost based on file size and expected output.
@@ -1,15 +1,63 @@
 import re
+import os
+import atexit
+import orjson
+import hashlib
 import logging
-from typing import Dict, List, Tuple
-from jiwer import wer, cer, compute_measures
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from jiwer import process_characters, process_words
 import string
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Normalization tables and patterns, built once rather than per call
+_PUNCT_TABLE = str.maketrans('', '', string.punctuation)
+_SPECIAL_RE = re.compile(r'[^\w\s]')
+_SPACES_RE = re.compile(r'\s+')
+# Special-character replacement and whitespace collapsing fused into one pass
+_SPECIAL_OR_SPACES_RE = re.compile(r'(?:[^\w\s]|\s)+')
+
+
+def _build_ascii_table() -> bytes:
+    """Byte table that lowercases ASCII and maps whitespace and non-word controls to spaces."""
+    table = bytearray(range(256))
+    for code in range(128):
+        char = chr(code)
+        if _SPECIAL_OR_SPACES_RE.fullmatch(char):
+            table[code] = ord(' ')
+        else:
+            table[code] = ord(char.lower())
+    return bytes(table)
+
+
+# ASCII fast path for the default options: one bytes.translate pass deletes
+# punctuation, lowercases and blanks out remaining separators, then split/join
+# collapses and strips the spaces, all without the regex engine
+_ASCII_TABLE = _build_ascii_table()
+_ASCII_PUNCT = string.punctuation.encode('ascii')
+_DEFAULT_OPTIONS = ('lowercase', 'remove_punctuation', 'remove_multiple_spaces', 'strip', 'remove_special_chars')
+
+
+def _alignment_counts(alignment) -> Tuple[int, int, int, int]:
+    """Count hits, substitutions, deletions and insertions in one jiwer alignment."""
+    counts = {'equal': 0, 'substitute': 0, 'delete': 0, 'insert': 0}
+    for chunk in alignment:
+        if chunk.type == 'insert':
+            counts['insert'] += chunk.hyp_end_idx - chunk.hyp_start_idx
+        else:
+            counts[chunk.type] += chunk.ref_end_idx - chunk.ref_start_idx
+    return counts['equal'], counts['substitute'], counts['delete'], counts['insert']
+
+
+def _digest(text: str) -> str:
+    """Short content hash of a text, used as a WER cache key component."""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
 
 class WERCalculator:
-    def __init__(self):
+    def __init__(self, cache_path: Optional[str] = None):
         self.normalization_options = {
             'lowercase': True,
             'remove_punctuation': True,
@@ -17,6 +65,50 @@ class WERCalculator:
             'strip': True,
             'remove_special_chars': True
         }
+        # Metrics of previously scored (reference, hypothesis) pairs, persisted
+        # across runs so unchanged transcripts are not re-aligned; only enabled
+        # when a cache_path is given (main.py passes Config.WER_CACHE_PATH)
+        self._cache_path = Path(cache_path) if cache_path else None
+        self._cache: Dict[str, Dict[str, float]] = {}
+        self._cache_dirty = False
+        if self._cache_path is not None:
+            self._load_cache()
+            atexit.register(self.save_cache)
+    
+    def _load_cache(self):
+        """Load persisted metrics, starting empty if the cache is missing or unreadable."""
+        if not self._cache_path.exists():
+            return
+        try:
+            with open(self._cache_path, 'rb') as f:
+                cache = orjson.loads(f.read())
+            if not isinstance(cache, dict):
+                raise ValueError("expected a JSON object")
+            self._cache = cache
+            logger.info(f"Loaded {len(self._cache)} cached WER results from {self._cache_path}")
+        except Exception as e:
+            logger.warning(f"Could not load WER cache {self._cache_path}: {e}")
+            self._cache = {}
+    
+    def save_cache(self):
+        """Write cached metrics to disk if any were added since the last save."""
+        if self._cache_path is None or not self._cache_dirty:
+            return
+        # Write then rename so an interrupted save never leaves a truncated cache
+        self._cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._cache_path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(orjson.dumps(self._cache))
+        os.replace(tmp_path, self._cache_path)
+        self._cache_dirty = False
+    
+    def _cache_key(self, reference: str, hypothesis: str, normalize: bool) -> str:
+        """Key metrics by text content and the normalization that applies to it."""
+        if normalize:
+            mode = ','.join(f"{name}={int(bool(value))}" for name, value in sorted(self.normalization_options.items()))
+        else:
+            mode = 'raw'
+        return f"{_digest(reference)}:{_digest(hypothesis)}:{mode}"
     
     def normalize_text(self, text: str, options: Dict[str, bool] = None) -> str:
         """
@@ -32,27 +124,35 @@ class WERCalculator:
         if options is None:
             options = self.normalization_options
         
+        if text.isascii() and all(options.get(key, True) for key in _DEFAULT_OPTIONS):
+            translated = text.encode('ascii').translate(_ASCII_TABLE, _ASCII_PUNCT)
+            return b' '.join(translated.split()).decode('ascii')
+        
         normalized = text
         
         if options.get('lowercase', True):
             normalized = normalized.lower()
         
         if options.get('remove_punctuation', True):
-            translator = str.maketrans('', '', string.punctuation)
-            normalized = normalized.translate(translator)
+            normalized = normalized.translate(_PUNCT_TABLE)
         
-        if options.get('remove_special_chars', True):
-            normalized = re.sub(r'[^\w\s]', ' ', normalized)
+        remove_special_chars = options.get('remove_special_chars', True)
+        remove_multiple_spaces = options.get('remove_multiple_spaces', True)
         
-        if options.get('remove_multiple_spaces', True):
-            normalized = re.sub(r'\s+', ' ', normalized)
+        if remove_special_chars and remove_multiple_spaces:
+            normalized = _SPECIAL_OR_SPACES_RE.sub(' ', normalized)
+        elif remove_special_chars:
+            normalized = _SPECIAL_RE.sub(' ', normalized)
+        elif remove_multiple_spaces:
+            normalized = _SPACES_RE.sub(' ', normalized)
         
         if options.get('strip', True):
             normalized = normalized.strip()
         
         return normalized
     
-    def calculate_wer(self, reference: str, hypothesis: str, normalize: bool = True) -> Dict[str, float]:
+    def calculate_wer(self, reference: str, hypothesis: str, normalize: bool = True,
+                      compute_cer: bool = True) -> Dict[str, float]:
         """
         Calculate Word Error Rate and related metrics.
         
@@ -60,25 +160,38 @@ class WERCalculator:
             reference: Ground truth text
             hypothesis: Predicted text from ASR
             normalize: Whether to normalize texts before calculation
+            compute_cer: Whether to run the character-level alignment for CER;
+                when False, 'cer' is None
         
         Returns:
             Dictionary with WER, CER, and other metrics
         """
+        key = self._cache_key(reference, hypothesis, normalize)
+        cached = self._cache.get(key)
+        if cached is not None and (cached.get('cer') is not None or not compute_cer):
+            return dict(cached)
+        
+        # Normalize each text once; both alignments then only apply jiwer's
+        # default word/character reductions to the normalized strings
         if normalize:
             reference = self.normalize_text(reference)
             hypothesis = self.normalize_text(hypothesis)
         
-        measures = compute_measures(reference, hypothesis)
+        # jiwer maps each word to an integer id and aligns the id sequences with
+        # rapidfuzz's compiled Levenshtein, so no Python-level DP loop runs here
+        output = process_words(reference, hypothesis)
+        # The character alignment dominates scoring time, so skip it unless asked
+        cer = process_characters(reference, hypothesis).cer if compute_cer else None
         
         metrics = {
-            'wer': measures['wer'],
-            'cer': measures['cer'],
-            'hits': measures['hits'],
-            'substitutions': measures['substitutions'],
-            'deletions': measures['deletions'],
-            'insertions': measures['insertions'],
-            'reference_length': len(reference.split()),
-            'hypothesis_length': len(hypothesis.split())
+            'wer': output.wer,
+            'cer': cer,
+            'hits': output.hits,
+            'substitutions': output.substitutions,
+            'deletions': output.deletions,
+            'insertions': output.insertions,
+            'reference_length': len(output.references[0]),
+            'hypothesis_length': len(output.hypotheses[0])
         }
         
         if metrics['reference_length'] > 0:
@@ -86,6 +199,8 @@ class WERCalculator:
         else:
             metrics['accuracy'] = 0.0
         
+        self._cache[key] = dict(metrics)
+        self._cache_dirty = True
         return metrics
     
     def calculate_batch_wer(self, references: List[str], hypotheses: List[str], normalize: bool = True) -> Dict[str, float]:
@@ -103,17 +218,38 @@ class WERCalculator:
         if len(references) != len(hypotheses):
             raise ValueError("Number of references and hypotheses must match")
         
+        # Normalize every text once and feed the same lists to both alignments
         if normalize:
             references = [self.normalize_text(ref) for ref in references]
             hypotheses = [self.normalize_text(hyp) for hyp in hypotheses]
         
-        overall_wer = wer(references, hypotheses)
-        overall_cer = cer(references, hypotheses)
+        # One word-level and one character-level alignment over the whole batch
+        # give both the overall rates and every pair's counts
+        word_output = process_words(references, hypotheses)
+        char_output = process_characters(references, hypotheses)
+        overall_wer = word_output.wer
+        overall_cer = char_output.cer
         
         individual_metrics = []
-        for ref, hyp in zip(references, hypotheses):
-            metrics = self.calculate_wer(ref, hyp, normalize=False)
-            individual_metrics.append(metrics)
+        for ref_words, hyp_words, word_alignment, char_alignment in zip(
+            word_output.references, word_output.hypotheses,
+            word_output.alignments, char_output.alignments
+        ):
+            hits, substitutions, deletions, insertions = _alignment_counts(word_alignment)
+            char_hits, char_subs, char_dels, char_ins = _alignment_counts(char_alignment)
+            reference_length = len(ref_words)
+            
+            individual_metrics.append({
+                'wer': (substitutions + deletions + insertions) / reference_length,
+                'cer': (char_subs + char_dels + char_ins) / (char_hits + char_subs + char_dels),
+                'hits': hits,
+                'substitutions': substitutions,
+                'deletions': deletions,
+                'insertions': insertions,
+                'reference_length': reference_length,
+                'hypothesis_length': len(hyp_words),
+                'accuracy': hits / reference_length
+            })
         
         avg_metrics = {
             'overall_wer': overall_wer,
@@ -142,27 +278,32 @@ class WERCalculator:
             reference = self.normalize_text(reference)
             hypothesis = self.normalize_text(hypothesis)
         
-        ref_words = reference.split()
-        hyp_words = hypothesis.split()
-        
-        from difflib import SequenceMatcher
-        matcher = SequenceMatcher(None, ref_words, hyp_words)
-        
         errors = {
             'substitutions': [],
             'deletions': [],
             'insertions': []
         }
         
-        for op, i1, i2, j1, j2 in matcher.get_opcodes():
-            if op == 'replace':
-                for i, j in zip(range(i1, i2), range(j1, j2)):
-                    errors['substitutions'].append((ref_words[i], hyp_words[j]))
-            elif op == 'delete':
-                for i in range(i1, i2):
-                    errors['deletions'].append(ref_words[i])
-            elif op == 'insert':
-                for j in range(j1, j2):
-                    errors['insertions'].append(hyp_words[j])
+        # jiwer cannot align against an empty reference; every word is inserted
+        if not reference.split():
+            errors['insertions'] = hypothesis.split()
+            return errors
+        
+        # Reuse jiwer's compiled Levenshtein alignment (the same one behind the
+        # WER counts) rather than a pure-Python difflib match
+        output = process_words(reference, hypothesis)
+        ref_words = output.references[0]
+        hyp_words = output.hypotheses[0]
+        
+        for chunk in output.alignments[0]:
+            if chunk.type == 'substitute':
+                errors['substitutions'].extend(zip(
+                    ref_words[chunk.ref_start_idx:chunk.ref_end_idx],
+                    hyp_words[chunk.hyp_start_idx:chunk.hyp_end_idx]
+                ))
+            elif chunk.type == 'delete':
+                errors['deletions'].extend(ref_words[chunk.ref_start_idx:chunk.ref_end_idx])
+            elif chunk.type == 'insert':
+                errors['insertions'].extend(hyp_words[chunk.hyp_start_idx:chunk.hyp_end_idx])
         
         return errors
\ No newline at end of file